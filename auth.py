@@ -1,12 +1,16 @@
 """
 Module d'authentification: hashage, JWT, dépendances FastAPI
 """
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError, jwt, jwk
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
@@ -17,10 +21,21 @@ from models import User
 SECRET_KEY = "votre_cle_secrete_a_changer_en_production_123456789"  # À mettre dans .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 heures
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# Clé HMAC construite une seule fois: passée en str, jose la reconstruit
+# (et tente de la parser en JSON) à chaque encode/decode
+SIGNING_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
 
 # Configuration hashage mot de passe
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt est volontairement coûteux en CPU (et libère le GIL): il tourne dans un pool dédié,
+# borné au nombre de cœurs, et non dans le threadpool des endpoints. Une rafale de connexions
+# fait la queue ici sans bloquer les autres requêtes ni garder de connexion DB
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+password_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -35,6 +50,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password exécuté dans le pool bcrypt"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_pool, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash exécuté dans le pool bcrypt"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_pool, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crée un token JWT"""
     to_encode = data.copy()
@@ -42,10 +69,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + ACCESS_TOKEN_EXPIRE
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
     
     return encoded_jwt
 
@@ -55,21 +82,47 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authentifie un utilisateur"""
+def get_user_by_email_and_release(db: Session, email: str) -> Optional[User]:
+    """
+    get_user_by_email puis fermeture de la session: la connexion retourne au pool
+    pendant le calcul bcrypt (l'utilisateur reste lisible, détaché de la session)
+    """
     user = get_user_by_email(db, email)
+    db.close()
+    return user
+
+
+def create_user(db: Session, nom: str, email: str, hashed_password: str) -> User:
+    """Enregistre un nouvel utilisateur (mot de passe déjà hashé)"""
+    db_user = User(nom=nom, email=email, hashed_password=hashed_password)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    Authentifie un utilisateur depuis un endpoint async:
+    requête DB dans le threadpool, vérification bcrypt dans le pool dédié
+    """
+    user = await run_in_threadpool(get_user_by_email_and_release, db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
-    """Dépendance FastAPI pour récupérer l'utilisateur courant depuis le token"""
+    """
+    Dépendance FastAPI pour récupérer l'utilisateur courant depuis le token
+    Synchrone (def) pour que la requête DB s'exécute dans le threadpool
+    et ne bloque pas la boucle d'événements
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token invalide ou expiré",
@@ -77,7 +130,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
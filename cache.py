@@ -0,0 +1,118 @@
+"""
+Cache des réponses GET publiques (fastapi-cache2)
+Redis si REDIS_URL est défini (production), sinon cache mémoire (local)
+"""
+import hashlib
+import os
+from typing import Optional
+
+from anyio import from_thread
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from database import SessionLocal
+from models import User, Recipe, Ingredient, Step
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_PREFIX = "mlc"
+CACHE_STATUS_HEADER = "X-FastAPI-Cache"
+
+# Namespace des endpoints de lecture des recettes (liste + détail)
+RECIPES_NAMESPACE = "recipes"
+
+# Modèles dont le contenu apparaît dans les réponses en cache
+RECIPE_MODELS = (Recipe, Ingredient, Step)
+# Un nouvel utilisateur n'a pas de recette: seules ses modifications comptent (nom, is_admin)
+AUTHOR_MODELS = (User,)
+
+# Clé de session.info marquant une transaction qui a modifié des recettes
+RECIPES_CHANGED = "recipes_changed"
+
+
+def init_cache():
+    """Initialise le backend de cache (appelé au démarrage)"""
+    if REDIS_URL:
+        backend = RedisBackend(aioredis.from_url(REDIS_URL))
+    else:
+        backend = InMemoryBackend()
+    FastAPICache.init(backend, prefix=CACHE_PREFIX, cache_status_header=CACHE_STATUS_HEADER)
+
+
+def request_key_builder(
+    func,
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple = (),
+    kwargs: Optional[dict] = None,
+) -> str:
+    """
+    Clé de cache construite depuis les arguments validés de l'endpoint (hors session DB)
+    - repr() de chaque valeur: "a&b=c" en un seul paramètre ne peut pas prendre
+      la clé de deux paramètres, ni None celle de la chaîne "None"
+    - chaque paramètre déclaré compte (categorie, search, auteur_id, tag, skip, limit, after_*),
+      les paramètres inconnus de l'URL (?junk=1) sont ignorés: pas d'entrée de cache en plus
+    Le key builder par défaut utilise tous les kwargs, dont la session DB qui change à chaque requête
+    """
+    params = sorted(
+        (name, value) for name, value in (kwargs or {}).items() if not isinstance(value, Session)
+    )
+    raw_key = f"{func.__module__}:{func.__name__}:{request.url.path}:{params!r}"
+    return f"{namespace}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+
+
+def invalidate_recipes_cache():
+    """
+    Vide le cache des recettes après une écriture
+    Appelé après chaque commit qui touche aux recettes (voir les événements ci-dessous),
+    depuis un endpoint synchrone (exécuté dans le threadpool d'anyio)
+    """
+    try:
+        from_thread.run(FastAPICache.clear, RECIPES_NAMESPACE)
+    except Exception as e:
+        # Le cache expirera de lui-même, l'écriture en base est déjà faite
+        print(f"⚠️ Cache: invalidation impossible ({e})")
+
+
+# ============== INVALIDATION SUR ÉVÉNEMENTS DE SESSION ==============
+# Les endpoints n'appellent pas l'invalidation eux-mêmes: toute écriture commitée
+# sur une recette (ou son auteur) vide le cache, y compris depuis les endpoints admin
+
+@event.listens_for(SessionLocal, "after_flush")
+def track_recipe_changes(session, flush_context):
+    """Marque la transaction si le flush écrit des recettes, ingrédients, étapes ou auteurs"""
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(obj, RECIPE_MODELS) for obj in changed) or any(
+        isinstance(obj, AUTHOR_MODELS) for obj in (*session.dirty, *session.deleted)
+    ):
+        session.info[RECIPES_CHANGED] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def track_recipe_statements(orm_execute_state):
+    """Même marquage pour les INSERT/UPDATE/DELETE exécutés directement (hors flush)"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, RECIPE_MODELS + AUTHOR_MODELS):
+        orm_execute_state.session.info[RECIPES_CHANGED] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def invalidate_after_commit(session):
+    """Vide le cache une fois les écritures commitées"""
+    if session.info.pop(RECIPES_CHANGED, False):
+        invalidate_recipes_cache()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def forget_rolled_back_changes(session):
+    """Rien à invalider si la transaction est annulée"""
+    session.info.pop(RECIPES_CHANGED, None)
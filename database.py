@@ -1,8 +1,10 @@
 """
 Configuration de la base de données avec support PostgreSQL (production) et SQLite (local)
 """
+import json
 import os
-from sqlalchemy import create_engine
+import traceback
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -13,17 +15,64 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./monlivredecuisine.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Taille du pool de connexions PostgreSQL
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_POOL_OVERFLOW = int(os.getenv("DB_POOL_OVERFLOW", 20))
+
 # Configuration du moteur selon le type de DB
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL, 
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        # JSON stocké en texte: garder les accents lisibles ("Été" et non "\u00c9t\u00e9")
+        json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False)
     )
 else:
-    engine = create_engine(DATABASE_URL)
+    # Pool de connexions PostgreSQL
+    # Attention: pool_size + max_overflow (x nombre de workers uvicorn)
+    # doit rester inférieur au max_connections de PostgreSQL
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_OVERFLOW,
+        pool_timeout=30,  # secondes d'attente max pour obtenir une connexion
+        pool_recycle=1800,  # recycle les connexions après 30 min (coupures Railway)
+        pool_pre_ping=True,  # vérifie la connexion avant usage
+        # LIFO: réutilise les connexions les plus récentes, les autres restent inactives
+        # et sont recyclées; moins de ping sur des connexions que Railway a coupées
+        pool_use_lifo=True
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Mode debug (DEBUG=1/true/yes): signale chaque chargement paresseux de relation,
+# source typique des requêtes N+1 pendant la sérialisation des réponses
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if DEBUG:
+    @event.listens_for(SessionLocal, "do_orm_execute")
+    def warn_lazy_load(orm_execute_state):
+        """Affiche la relation chargée paresseusement et la ligne du projet qui l'a déclenchée"""
+        if not (orm_execute_state.is_select and orm_execute_state.is_relationship_load):
+            return
+        state = orm_execute_state.lazy_loaded_from
+        if state is None:
+            return  # selectinload & co: chargement groupé, pas paresseux
+        path = orm_execute_state.loader_strategy_path
+        relation = path[-1] if path else state.class_.__name__
+        caller = next(
+            (
+                f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                for frame in reversed(traceback.extract_stack())
+                if frame.filename.startswith(PROJECT_DIR)
+                and frame.filename != os.path.abspath(__file__)
+                and "site-packages" not in frame.filename
+            ),
+            "sérialisation de la réponse"
+        )
+        print(f"⚠️ N+1: chargement paresseux de {relation} ({caller})")
+
 Base = declarative_base()
 
 
@@ -2,84 +2,63 @@
 MonLivreDeCuisine - API FastAPI
 Endpoints: Auth, CRUD Recettes, Recherche Frigo
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+import os
+import re
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, text, or_
+from fastapi_cache.decorator import cache
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, desc, or_, select, insert, tuple_, type_coerce, exists, any_, bindparam, Text, JSON
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, to_tsvector, to_tsquery
 from typing import List
-from datetime import timedelta
 
-from database import engine, get_db, Base
+from database import engine, get_db, DB_POOL_SIZE, DB_POOL_OVERFLOW
 from models import User, Recipe, Ingredient, Step, CategorieRecette
 from schemas import (
     UserCreate, UserResponse, UserLogin, Token,
-    RecipeCreate, RecipeUpdate, RecipeResponse, RecipeListResponse,
+    RecipeCreate, RecipeUpdate, RecipeResponse, RecipeListResponse, RecipePage, RecipeCursor,
     FrigoSearchRequest, FrigoSearchResult
 )
+from cache import (
+    init_cache, request_key_builder,
+    RECIPES_NAMESPACE, CACHE_STATUS_HEADER
+)
 from auth import (
-    get_password_hash, authenticate_user, create_access_token,
-    get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES, get_user_by_email
+    get_password_hash_async, authenticate_user_async, create_access_token, create_user,
+    get_current_user, ACCESS_TOKEN_EXPIRE, get_user_by_email_and_release
 )
-# from sqlalchemy import text  <-- Removed redundant import
-
-
-# Création des tables
-Base.metadata.create_all(bind=engine)
-
-# Migration: ajouter is_admin si la colonne n'existe pas
-try:
-    with engine.connect() as conn:
-        conn.execute(text("ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE"))
-        conn.commit()
-        print("✅ Migration: colonne is_admin ajoutée")
-except Exception as e:
-    pass
-
-# Migration: corriger les utilisateurs avec is_admin NULL
-try:
-    with engine.connect() as conn:
-        conn.execute(text("UPDATE users SET is_admin = FALSE WHERE is_admin IS NULL"))
-        conn.commit()
-        print("✅ Migration: is_admin NULL -> FALSE")
-except Exception as e:
-    pass
-
-# Migration: ajouter tags si la colonne n'existe pas
-try:
-    with engine.connect() as conn:
-        conn.execute(text("ALTER TABLE recipes ADD COLUMN tags TEXT"))
-        conn.commit()
-        print("✅ Migration: colonne tags ajoutée")
-except Exception as e:
-    pass
-
-# Migration: Convertir categorie en VARCHAR pour éviter les problèmes d'Enum et supporter Gourmandises
-try:
-    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
-        print("🔍 Migration: Conversion colonne categorie en VARCHAR...")
-        if engine.dialect.name == 'postgresql':
-            # Convertir l'enum en text/varchar
-            conn.execute(text("ALTER TABLE recipes ALTER COLUMN categorie TYPE VARCHAR(50) USING categorie::text"))
-            print("✅ Migration: Colonne categorie convertie en VARCHAR (PostgreSQL)")
-        else:
-            # SQLite (déjà flexible)
-            print("ℹ️ Migration ignorée (SQLite)")
+from migrate import run_migrations
+
+
+# Les endpoints synchrones (def) tournent dans le threadpool d'anyio (40 threads par défaut)
+# On l'aligne sur la capacité du pool DB: au-delà, les threads attendraient une connexion
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", DB_POOL_SIZE + DB_POOL_OVERFLOW))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage de l'application: migrations, threadpool et cache"""
+    run_migrations()
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    init_cache()
+    yield
 
-except Exception as e:
-    print(f"Migration note (Varchar): {e}")
-    pass
 
 # Application FastAPI
 app = FastAPI(
     title="MonLivreDeCuisine API",
     description="API de gestion de recettes de cuisine familiale",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configuration CORS pour React
 # En production, utilise FRONTEND_URL, sinon autorise localhost
-import os
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
 origins = [
     frontend_url,
@@ -101,35 +80,45 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def revalidate_cached_responses(request, call_next):
+    """
+    Les réponses issues du cache serveur sont revalidées par le navigateur (ETag)
+    plutôt que servies depuis son propre cache, pour voir tout de suite les modifications
+    """
+    response = await call_next(request)
+    if CACHE_STATUS_HEADER in response.headers:
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 # ============== AUTH ENDPOINTS ==============
 
 @app.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    """Inscription d'un nouvel utilisateur"""
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    """
+    Inscription d'un nouvel utilisateur
+    Async: les requêtes DB passent par le threadpool, le hash bcrypt par son pool dédié
+    """
     # Vérifier si l'email existe déjà
-    if get_user_by_email(db, user.email):
+    if await run_in_threadpool(get_user_by_email_and_release, db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cet email est déjà utilisé"
         )
     
     # Créer l'utilisateur
-    db_user = User(
-        nom=user.nom,
-        email=user.email,
-        hashed_password=get_password_hash(user.password)
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(create_user, db, user.nom, user.email, hashed_password)
 
 
 @app.post("/auth/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    """Connexion utilisateur - retourne un token JWT"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    """
+    Connexion utilisateur - retourne un token JWT
+    Async: bcrypt ne monopolise ni un thread du threadpool ni une connexion DB
+    """
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -140,7 +129,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     
     access_token = create_access_token(
         data={"sub": user.email},
-        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expires_delta=ACCESS_TOKEN_EXPIRE
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -154,46 +143,209 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 # ============== RECIPES ENDPOINTS ==============
 
-@app.get("/recipes", response_model=List[RecipeListResponse])
-def get_recipes(
-    categorie: CategorieRecette = None,
+# Caractère d'échappement des motifs LIKE (déjà celui par défaut de PostgreSQL)
+LIKE_ESCAPE = "\\"
+
+
+def contains_pattern(term: str) -> str:
+    """Motif LIKE '%term%' où %, _ et \\ saisis par l'utilisateur restent littéraux"""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        term = term.replace(char, LIKE_ESCAPE + char)
+    return f"%{term}%"
+
+
+def insert_rows(db: Session, model, rows: List[dict]):
+    """
+    INSERT multi-lignes (ingrédients, étapes) via l'API 2.0: insert(model) + liste de dicts
+    render_nulls: les valeurs None restent dans le même lot au lieu d'en créer un autre
+    """
+    if rows:  # Sans paramètres, insert() insérerait une ligne vide
+        db.execute(insert(model), rows, execution_options={"render_nulls": True})
+
+
+# Chargement complet d'une recette pour RecipeResponse:
+# auteur joint (many-to-one), ingrédients et étapes en une requête IN chacun
+RECIPE_DETAIL_OPTIONS = (
+    joinedload(Recipe.auteur),
+    selectinload(Recipe.ingredients),
+    selectinload(Recipe.steps)
+)
+
+
+def load_recipe_details(db: Session, recipe_id: int):
+    """Recette avec auteur, ingrédients et étapes (3 requêtes), ou None"""
+    # populate_existing: après un commit l'objet est déjà dans l'identity map (expiré),
+    # les options doivent quand même s'appliquer au rechargement
+    return db.get(Recipe, recipe_id, options=RECIPE_DETAIL_OPTIONS, populate_existing=True)
+
+
+# Taille maximale d'une page de la liste (paramètre limit)
+MAX_RECIPES_LIMIT = 1000
+
+
+# Requête de base de la liste, construite une fois: seules les colonnes de RecipeListResponse
+# sont lues (auteur via jointure), sans hydrater d'objets ORM ni déclencher de chargements
+# paresseux. Les filtres s'y ajoutent par requête; valeurs et LIMIT/OFFSET restent des
+# paramètres liés, le SQL compilé est donc réutilisé d'un appel à l'autre
+RECIPE_LIST_STMT = (
+    select(
+        Recipe.id, Recipe.titre, Recipe.categorie, Recipe.temps_prep, Recipe.temps_cuisson,
+        Recipe.temperature, Recipe.tags, Recipe.auteur_id,
+        User.nom.label("auteur_nom"), User.email.label("auteur_email"), User.is_admin.label("auteur_is_admin")
+    )
+    .join(Recipe.auteur)
+    .order_by(Recipe.categorie, Recipe.titre, Recipe.id)
+)
+
+
+def list_recipes(
+    db: Session,
+    categorie: str = None,
     search: str = None,
     auteur_id: int = None,
     tag: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
-):
-    """Liste toutes les recettes avec filtres optionnels"""
-    query = db.query(Recipe)
+    after_categorie: str = None,
+    after_titre: str = None,
+    after_id: int = None
+) -> List[RecipeListResponse]:
+    """Recettes filtrées et paginées, partagé par /recipes et /recipes/page"""
+    keyset = (after_categorie, after_titre, after_id)
+    if any(value is not None for value in keyset) and None in keyset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_categorie, after_titre et after_id doivent être fournis ensemble"
+        )
+    
+    query = RECIPE_LIST_STMT
     
     # Filtre par catégorie
     if categorie:
-        query = query.filter(Recipe.categorie == categorie)
+        query = query.where(Recipe.categorie == categorie)
     
     # Recherche par titre
     if search:
-        query = query.filter(Recipe.titre.ilike(f"%{search}%"))
+        words = re.findall(r"[^\W_]+", search)
+        if engine.dialect.name == 'postgresql' and words:
+            # Plein texte (index GIN), chaque mot en préfixe pour la saisie en cours: "omel" -> Omelette
+            # OU sous-chaîne (index trigramme), pour les morceaux de mot: "melet" -> Omelette
+            tsquery = " & ".join(f"{word}:*" for word in words)
+            query = query.where(or_(
+                to_tsvector("french", Recipe.titre).op("@@")(to_tsquery("french", tsquery)),
+                Recipe.titre.ilike(contains_pattern(search), escape=LIKE_ESCAPE)
+            ))
+        else:
+            query = query.where(Recipe.titre.ilike(contains_pattern(search), escape=LIKE_ESCAPE))
     
     # Filtre par auteur
     if auteur_id:
-        query = query.filter(Recipe.auteur_id == auteur_id)
+        query = query.where(Recipe.auteur_id == auteur_id)
     
     # Filtre par tag (les tags sont stockés en JSON: ["tag1", "tag2"])
     if tag:
-        # Recherche le tag dans le JSON string (avec ou sans guillemets)
-        query = query.filter(
-            Recipe.tags.ilike(f'%"{tag}"%') | Recipe.tags.ilike(f"%{tag}%")
+        if engine.dialect.name == 'postgresql':
+            # tags @> '["tag"]' - utilise l'index GIN
+            query = query.where(type_coerce(Recipe.tags, JSONB).contains([tag]))
+        else:
+            # SQLite: parcours du tableau JSON avec json_each
+            tag_values = func.json_each(Recipe.tags).table_valued("value")
+            query = query.where(select(tag_values.c.value).where(tag_values.c.value == tag).exists())
+    
+    # Pagination par curseur: lignes strictement après (categorie, titre, id) dans l'ordre du tri
+    if after_id is not None:
+        query = query.where(
+            tuple_(Recipe.categorie, Recipe.titre, Recipe.id) > tuple_(after_categorie, after_titre, after_id)
         )
+    elif skip:
+        query = query.offset(skip)
+    
+    rows = db.execute(query.limit(limit)).all()
+    # Sérialisation explicite: le cache stocke des schémas Pydantic, pas des objets ORM
+    return [
+        RecipeListResponse(
+            id=row.id,
+            titre=row.titre,
+            categorie=row.categorie,
+            temps_prep=row.temps_prep,
+            temps_cuisson=row.temps_cuisson,
+            temperature=row.temperature,
+            tags=row.tags,
+            auteur_id=row.auteur_id,
+            auteur=UserResponse(
+                id=row.auteur_id,
+                nom=row.auteur_nom,
+                email=row.auteur_email,
+                is_admin=row.auteur_is_admin
+            )
+        )
+        for row in rows
+    ]
+
+
+@app.get("/recipes", response_model=List[RecipeListResponse])
+@cache(expire=60, namespace=RECIPES_NAMESPACE, key_builder=request_key_builder)
+def get_recipes(
+    categorie: CategorieRecette = None,
+    search: str = None,
+    auteur_id: int = None,
+    tag: str = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_RECIPES_LIMIT),
+    after_categorie: str = None,
+    after_titre: str = None,
+    after_id: int = None,
+    db: Session = Depends(get_db)
+) -> List[RecipeListResponse]:
+    """
+    Liste toutes les recettes avec filtres optionnels (mise en cache 60s)
     
-    recipes = query.order_by(Recipe.categorie, Recipe.titre).offset(skip).limit(limit).all()
-    return recipes
+    Pagination:
+    - par curseur (recommandé): after_categorie/after_titre/after_id = dernière recette reçue,
+      coût constant quelle que soit la page
+    - par offset (skip): la base parcourt et jette les `skip` premières lignes
+    """
+    return list_recipes(
+        db, categorie, search, auteur_id, tag, skip, limit,
+        after_categorie, after_titre, after_id
+    )
+
+
+@app.get("/recipes/page", response_model=RecipePage)
+@cache(expire=60, namespace=RECIPES_NAMESPACE, key_builder=request_key_builder)
+def get_recipes_page(
+    categorie: CategorieRecette = None,
+    search: str = None,
+    auteur_id: int = None,
+    tag: str = None,
+    limit: int = Query(100, ge=1, le=MAX_RECIPES_LIMIT),
+    after_categorie: str = None,
+    after_titre: str = None,
+    after_id: int = None,
+    db: Session = Depends(get_db)
+) -> RecipePage:
+    """
+    Liste paginée par curseur (mise en cache 60s)
+    next_cursor contient les paramètres after_* de la page suivante (null sur la dernière page)
+    """
+    # Une ligne de plus que demandé: sa présence indique qu'une page suivante existe
+    items = list_recipes(
+        db, categorie, search, auteur_id, tag, 0, limit + 1,
+        after_categorie, after_titre, after_id
+    )
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = RecipeCursor(after_categorie=last.categorie, after_titre=last.titre, after_id=last.id)
+    return RecipePage(items=items, next_cursor=next_cursor)
 
 
 @app.get("/recipes/{recipe_id}", response_model=RecipeResponse)
-def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    """Récupère une recette par son ID avec tous les détails"""
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+@cache(expire=300, namespace=RECIPES_NAMESPACE, key_builder=request_key_builder)
+def get_recipe(recipe_id: int, db: Session = Depends(get_db)) -> RecipeResponse:
+    """Récupère une recette par son ID avec tous les détails (mise en cache 5 min)"""
+    recipe = load_recipe_details(db, recipe_id)
     
     if not recipe:
         raise HTTPException(
@@ -201,7 +353,7 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
             detail="Recette non trouvée"
         )
     
-    return recipe
+    return RecipeResponse.model_validate(recipe)
 
 
 @app.post("/recipes", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
@@ -211,8 +363,6 @@ def create_recipe(
     current_user: User = Depends(get_current_user)
 ):
     """Crée une nouvelle recette (authentification requise)"""
-    import json
-    
     # Créer la recette
     db_recipe = Recipe(
         titre=recipe.titre,
@@ -220,35 +370,25 @@ def create_recipe(
         temps_prep=recipe.temps_prep,
         temps_cuisson=recipe.temps_cuisson,
         temperature=recipe.temperature,
-        tags=json.dumps(recipe.tags, ensure_ascii=False) if recipe.tags else None,
+        tags=recipe.tags or None,
         auteur_id=current_user.id
     )
     db.add(db_recipe)
     db.flush()  # Pour obtenir l'ID
+    recipe_id = db_recipe.id  # Lu avant le commit, qui expire l'objet
     
-    # Ajouter les ingrédients
-    for ingredient in recipe.ingredients:
-        db_ingredient = Ingredient(
-            nom=ingredient.nom,
-            quantite=ingredient.quantite,
-            unite=ingredient.unite,
-            recipe_id=db_recipe.id
-        )
-        db.add(db_ingredient)
-    
-    # Ajouter les étapes
-    for step in recipe.steps:
-        db_step = Step(
-            description=step.description,
-            ordre=step.ordre,
-            recipe_id=db_recipe.id
-        )
-        db.add(db_step)
+    # Ajouter les ingrédients et les étapes (un INSERT multi-lignes par table)
+    insert_rows(db, Ingredient, [
+        {**ingredient.model_dump(), "recipe_id": recipe_id} for ingredient in recipe.ingredients
+    ])
+    insert_rows(db, Step, [
+        {**step.model_dump(), "recipe_id": recipe_id} for step in recipe.steps
+    ])
     
     db.commit()
-    db.refresh(db_recipe)
     
-    return db_recipe
+    # Relecture unique avec les options de chargement, plutôt que refresh + 3 chargements paresseux
+    return load_recipe_details(db, recipe_id)
 
 
 @app.put("/recipes/{recipe_id}", response_model=RecipeResponse)
@@ -259,7 +399,7 @@ def update_recipe(
     current_user: User = Depends(get_current_user)
 ):
     """Met à jour une recette (seul l'auteur peut modifier)"""
-    db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    db_recipe = db.get(Recipe, recipe_id)
     
     if not db_recipe:
         raise HTTPException(
@@ -273,8 +413,6 @@ def update_recipe(
             detail="Vous n'êtes pas autorisé à modifier cette recette"
         )
     
-    import json
-    
     # Mettre à jour les champs de base
     update_data = recipe_update.model_dump(exclude_unset=True)
     
@@ -284,39 +422,30 @@ def update_recipe(
     
     # Mettre à jour les tags
     if "tags" in update_data:
-        db_recipe.tags = json.dumps(update_data["tags"], ensure_ascii=False) if update_data["tags"] else None
+        db_recipe.tags = update_data["tags"] or None
     
     # Mettre à jour les ingrédients si fournis
     if recipe_update.ingredients is not None:
-        # Supprimer les anciens ingrédients
-        db.query(Ingredient).filter(Ingredient.recipe_id == recipe_id).delete()
-        # Ajouter les nouveaux
-        for ingredient in recipe_update.ingredients:
-            db_ingredient = Ingredient(
-                nom=ingredient.nom,
-                quantite=ingredient.quantite,
-                unite=ingredient.unite,
-                recipe_id=recipe_id
-            )
-            db.add(db_ingredient)
+        # Supprimer les anciens ingrédients (DELETE direct: aucun n'est chargé en session,
+        # la collection est rechargée après le commit)
+        db.query(Ingredient).filter(Ingredient.recipe_id == recipe_id).delete(synchronize_session=False)
+        # Ajouter les nouveaux (un seul INSERT multi-lignes)
+        insert_rows(db, Ingredient, [
+            {**ingredient.model_dump(), "recipe_id": recipe_id} for ingredient in recipe_update.ingredients
+        ])
     
     # Mettre à jour les étapes si fournies
     if recipe_update.steps is not None:
         # Supprimer les anciennes étapes
-        db.query(Step).filter(Step.recipe_id == recipe_id).delete()
-        # Ajouter les nouvelles
-        for step in recipe_update.steps:
-            db_step = Step(
-                description=step.description,
-                ordre=step.ordre,
-                recipe_id=recipe_id
-            )
-            db.add(db_step)
+        db.query(Step).filter(Step.recipe_id == recipe_id).delete(synchronize_session=False)
+        # Ajouter les nouvelles (un seul INSERT multi-lignes)
+        insert_rows(db, Step, [
+            {**step.model_dump(), "recipe_id": recipe_id} for step in recipe_update.steps
+        ])
     
     db.commit()
-    db.refresh(db_recipe)
     
-    return db_recipe
+    return load_recipe_details(db, recipe_id)
 
 
 @app.delete("/recipes/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -326,7 +455,8 @@ def delete_recipe(
     current_user: User = Depends(get_current_user)
 ):
     """Supprime une recette (seul l'auteur peut supprimer)"""
-    db_recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    # Ingrédients et étapes préchargés: la cascade delete-orphan doit les connaître
+    db_recipe = db.get(Recipe, recipe_id, options=[selectinload(Recipe.ingredients), selectinload(Recipe.steps)])
     
     if not db_recipe:
         raise HTTPException(
@@ -356,54 +486,68 @@ def search_frigo(search: FrigoSearchRequest, db: Session = Depends(get_db)):
     Algorithme V2:
     1. Recherche partielle (ILIKE) des ingrédients
     2. Compte les matchs
-    3. Mode Strict: ne garde que les recettes où tous les ingrédients sont trouvés
+    3. Mode Strict: ne garde que les recettes où tous les ingrédients sont trouvés (filtré en SQL)
     """
-    # Nettoyer les entrées
-    search_ingredients = [ing.strip() for ing in search.ingredients if ing.strip()]
+    # Entrées déjà nettoyées et dédoublonnées par FrigoSearchRequest
+    search_ingredients = search.ingredients
     
     if not search_ingredients:
         return []
     
-    # Construire la condition OR ILIKE pour chaque ingrédient cherché
-    # Ex: nom ILIKE %tomate% OR nom ILIKE %oeuf%
-    filters = [Ingredient.nom.ilike(f"%{ing}%") for ing in search_ingredients]
-    
-    # Requête: trouver les (Recipe.id, Ingredient.nom) qui matchent
-    # On évite group_concat qui est spécifique au SGBD (SQLite vs Postgres)
-    matching_rows = (
-        db.query(Recipe.id, Ingredient.nom)
-        .join(Ingredient)
-        .filter(or_(*filters)) # Utilisation de OR avec ILIKE
-        .all()
+    # Construire la condition ILIKE pour les ingrédients cherchés
+    # ILIKE est natif sur PostgreSQL (pas de lower() autour de la colonne). Avec le joker
+    # en tête, seul un index trigramme peut servir ce filtre (pas un btree ni citext)
+    # Termes déjà en minuscules; %, _ et \ échappés pour ne pas devenir des jokers
+    patterns = [contains_pattern(ing) for ing in search_ingredients]
+    if engine.dialect.name == 'postgresql':
+        # nom ILIKE ANY(ARRAY[...]): un seul paramètre tableau, même SQL quel que soit le nombre
+        # (pas de clause ESCAPE possible avec ANY: on s'appuie sur l'échappement par défaut, \)
+        ingredient_filter = Ingredient.nom.ilike(
+            any_(bindparam("patterns", patterns, type_=ARRAY(Text)))
+        )
+    else:
+        # SQLite: nom ILIKE %tomate% OR nom ILIKE %oeuf% (LIKE n'y a pas d'échappement par défaut)
+        ingredient_filter = or_(*[Ingredient.nom.ilike(pattern, escape=LIKE_ESCAPE) for pattern in patterns])
+    
+    # Agrégation des noms trouvés en liste Python, selon le SGBD (sans concaténation à découper)
+    if engine.dialect.name == 'postgresql':
+        matched_agg = func.array_agg(Ingredient.nom)  # tableau natif
+    else:
+        matched_agg = func.json_group_array(Ingredient.nom, type_=JSON)  # tableau JSON décodé
+    
+    # CTE: nombre de matchs et noms trouvés par recette (GROUP BY sur ingredients seuls)
+    matches = (
+        select(
+            Ingredient.recipe_id.label("recipe_id"),
+            func.count(Ingredient.id).label("match_count"),
+            matched_agg.label("matched_names")
+        )
+        .where(ingredient_filter)
+        .group_by(Ingredient.recipe_id)
+        .cte("matches")
     )
     
-    # Grouper par recette en Python
-    matches_map = {} # {recipe_id: [nom1, nom2, ...]}
-    for r_id, ing_nom in matching_rows:
-        if r_id not in matches_map:
-            matches_map[r_id] = []
-        matches_map[r_id].append(ing_nom)
-    
-    # Trier par nombre de matchs décroissant
-    sorted_stats = sorted(matches_map.items(), key=lambda item: len(item[1]), reverse=True)
+    # Requête unique: recettes jointes à la CTE, triées par nombre de matchs décroissant
+    query = (
+        db.query(Recipe, matches.c.match_count, matches.c.matched_names)
+        .join(matches, Recipe.id == matches.c.recipe_id)
+        .order_by(matches.c.match_count.desc(), Recipe.titre)
+        .options(joinedload(Recipe.auteur)) # Nécessaire pour RecipeListResponse
+    )
+    if search.strict_mode:
+        # Mode strict: tous les ingrédients de la recette doivent être trouvés
+        # Nombre total en sous-requête corrélée (index ix_ingredients_recipe_id), filtré en SQL
+        total_ingredients = (
+            select(func.count(Ingredient.id))
+            .where(Ingredient.recipe_id == Recipe.id)
+            .correlate(Recipe)
+            .scalar_subquery()
+        )
+        query = query.filter(matches.c.match_count == total_ingredients)
     
     # Construire les résultats
     results = []
-    for recipe_id, matched_names in sorted_stats:
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if not recipe:
-            continue
-        
-        match_count = len(matched_names)
-        
-        # Filtre Mode Strict
-        if search.strict_mode:
-            # On vérifie si on a trouvé tous les ingrédients nécessaires
-            # Note: len(recipe.ingredients) charge les ingrédients si pas déjà chargés
-            total_ingredients = len(recipe.ingredients)
-            if match_count < total_ingredients:
-                continue
-
+    for recipe, match_count, matched_names in query.all():
         results.append(FrigoSearchResult(
             recipe=RecipeListResponse.model_validate(recipe),
             match_count=match_count,
@@ -441,7 +585,12 @@ def admin_delete_user(
     db: Session = Depends(get_db)
 ):
     """Supprime un utilisateur (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    # La cascade parcourt recettes -> ingrédients/étapes: tout est préchargé en 3 requêtes
+    # au lieu de 2 chargements paresseux par recette
+    user = db.get(User, user_id, options=[
+        selectinload(User.recipes).selectinload(Recipe.ingredients),
+        selectinload(User.recipes).selectinload(Recipe.steps)
+    ])
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     if user.id == admin.id:
@@ -458,7 +607,7 @@ def admin_delete_recipe(
     db: Session = Depends(get_db)
 ):
     """Supprime n'importe quelle recette (admin only)"""
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    recipe = db.get(Recipe, recipe_id, options=[selectinload(Recipe.ingredients), selectinload(Recipe.steps)])
     if not recipe:
         raise HTTPException(status_code=404, detail="Recette non trouvée")
     db.delete(recipe)
@@ -473,7 +622,7 @@ def toggle_admin(
     db: Session = Depends(get_db)
 ):
     """Promouvoir/rétrograder un utilisateur admin (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     if user.id == admin.id:
@@ -493,9 +642,9 @@ def make_first_admin(
     Promouvoir le premier admin - fonctionne UNIQUEMENT s'il n'y a aucun admin.
     L'utilisateur connecté devient admin.
     """
-    # Vérifier s'il y a déjà un admin
-    existing_admin = db.query(User).filter(User.is_admin == True).first()
-    if existing_admin:
+    # Vérifier s'il y a déjà un admin (EXISTS sur l'index partiel ix_users_is_admin_true)
+    admin_exists = db.query(exists().where(User.is_admin)).scalar()
+    if admin_exists:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Un administrateur existe déjà. Utilisez l'endpoint toggle-admin."
@@ -511,7 +660,7 @@ def make_first_admin(
 # ============== ROOT ENDPOINT ==============
 
 @app.get("/")
-def root():
+async def root():
     """Endpoint racine - info API"""
     return {
         "message": "Bienvenue sur MonLivreDeCuisine API",
@@ -1,30 +1,150 @@
 """
-Script de migration pour ajouter la colonne is_admin
-Exécuter une seule fois sur Railway
+Migrations du schéma (tables, colonnes ajoutées après coup, index)
+Appelées au démarrage de l'API (lifespan), ou à la main: python migrate.py
+Chaque étape vérifie l'état du schéma: au régime établi, rien n'est modifié
 """
-import os
-from sqlalchemy import create_engine, text
-
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./monlivredecuisine.db")
-
-# Railway utilise "postgres://" mais SQLAlchemy a besoin de "postgresql://"
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-
-engine = create_engine(DATABASE_URL)
-
-def migrate():
-    with engine.connect() as conn:
-        # Ajouter la colonne is_admin si elle n'existe pas
-        try:
-            conn.execute(text("ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE"))
-            conn.commit()
-            print("✅ Colonne is_admin ajoutée avec succès")
-        except Exception as e:
-            if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
-                print("ℹ️ La colonne is_admin existe déjà")
-            else:
-                print(f"❌ Erreur: {e}")
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from database import engine, Base
+import models  # noqa: F401 - enregistre les tables dans Base.metadata
+
+# Verrou consultatif PostgreSQL: un seul worker applique les migrations à la fois
+MIGRATION_LOCK_ID = 20240101
+
+
+def add_column_if_missing(conn, table: str, column: str, ddl: str):
+    """
+    Ajoute une colonne si elle n'existe pas, sans passer par une exception
+    PostgreSQL: ADD COLUMN IF NOT EXISTS / SQLite: vérification via PRAGMA table_info
+    """
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+        return
+    existing_columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    if column not in existing_columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        print(f"✅ Migration: colonne {table}.{column} ajoutée")
+
+
+def column_type(conn, table: str, column: str):
+    """Type d'une colonne selon information_schema (PostgreSQL)"""
+    return conn.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).scalar()
+
+
+def column_is_nullable(conn, table: str, column: str) -> bool:
+    """La colonne accepte-t-elle NULL, selon information_schema (PostgreSQL)"""
+    return conn.execute(text(
+        "SELECT is_nullable FROM information_schema.columns "
+        "WHERE table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).scalar() == 'YES'
+
+
+@contextmanager
+def optional_step(conn, label: str):
+    """
+    Étape facultative: un échec est signalé sans interrompre les autres migrations
+    Sur PostgreSQL l'étape est isolée dans un SAVEPOINT pour ne pas invalider la transaction
+    """
+    savepoint = conn.begin_nested() if conn.dialect.name == 'postgresql' else None
+    try:
+        yield
+        if savepoint is not None:
+            savepoint.commit()
+    except Exception as e:
+        if savepoint is not None:
+            savepoint.rollback()
+        print(f"Migration note ({label}): {e}")
+
+
+def run_migrations(engine=engine):
+    """
+    Crée les tables et applique les migrations manuelles, en une seule transaction
+    (DDL transactionnel sur PostgreSQL: tout ou rien)
+    """
+    is_postgresql = engine.dialect.name == 'postgresql'
+
+    with engine.begin() as conn:
+        if is_postgresql:
+            # Plusieurs workers démarrent en même temps: les suivants attendent le premier
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+        # Création des tables
+        Base.metadata.create_all(bind=conn)
+
+        # Colonnes ajoutées après coup (is_admin, tags)
+        add_column_if_missing(conn, "users", "is_admin", "BOOLEAN NOT NULL DEFAULT FALSE")
+        add_column_if_missing(conn, "recipes", "tags", "TEXT")
+        # Corriger les utilisateurs avec is_admin NULL
+        result = conn.execute(text("UPDATE users SET is_admin = FALSE WHERE is_admin IS NULL"))
+        if result.rowcount:
+            print(f"✅ Migration: is_admin NULL -> FALSE ({result.rowcount} utilisateurs)")
+        # Puis is_admin NOT NULL avec valeur par défaut côté base (PostgreSQL; sur SQLite la
+        # contrainte ne peut pas être ajoutée après coup, la valeur par défaut de l'ORM suffit)
+        if is_postgresql and column_is_nullable(conn, "users", "is_admin"):
+            conn.execute(text(
+                "ALTER TABLE users ALTER COLUMN is_admin SET DEFAULT FALSE, "
+                "ALTER COLUMN is_admin SET NOT NULL"
+            ))
+            print("✅ Migration: colonne is_admin NOT NULL DEFAULT FALSE")
+
+        # Convertir categorie (ancien Enum) en VARCHAR pour supporter Gourmandises
+        # SQLite: déjà flexible, rien à faire
+        if is_postgresql and column_type(conn, "recipes", "categorie") != 'character varying':
+            conn.execute(text("ALTER TABLE recipes ALTER COLUMN categorie TYPE VARCHAR(50) USING categorie::text"))
+            print("✅ Migration: Colonne categorie convertie en VARCHAR (PostgreSQL)")
+
+        # Index déclarés dans models.py sur les tables existantes
+        # (create_all ne crée les index que pour les nouvelles tables)
+        with optional_step(conn, "index"):
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+            # Remplacé par ix_recipes_categorie_titre_id (même préfixe, plus l'id du curseur)
+            conn.execute(text("DROP INDEX IF EXISTS ix_recipes_categorie_titre"))
+
+        if not is_postgresql:
+            return
+
+        # Convertir tags (TEXT contenant du JSON) en JSONB + index GIN
+        with optional_step(conn, "tags JSONB"):
+            if column_type(conn, "recipes", "tags") != 'jsonb':
+                conn.execute(text("ALTER TABLE recipes ALTER COLUMN tags TYPE JSONB USING NULLIF(tags, '')::jsonb"))
+                print("✅ Migration: colonne tags convertie en JSONB")
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_recipes_tags_gin ON recipes USING GIN (tags jsonb_path_ops)"))
+
+        # Index plein texte sur le titre
+        # L'expression doit être identique à celle de get_recipes pour que l'index soit utilisé
+        with optional_step(conn, "titre FTS"):
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_recipes_titre_tsv ON recipes "
+                "USING GIN (to_tsvector('french', titre))"
+            ))
+
+        # Index trigrammes pour les recherches ILIKE '%...%' (extension pg_trgm)
+        with optional_step(conn, "pg_trgm"):
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+        # Titre des recettes (recherche de get_recipes)
+        with optional_step(conn, "titre trigram"):
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_recipes_titre_trgm ON recipes "
+                "USING GIN (titre gin_trgm_ops)"
+            ))
+
+        # Nom des ingrédients (recherche frigo)
+        # Sur la colonne brute: ILIKE est natif, search_frigo ne passe pas par lower()
+        with optional_step(conn, "ingredients trigram"):
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_ingredients_nom_trgm ON ingredients "
+                "USING GIN (nom gin_trgm_ops)"
+            ))
+
 
 if __name__ == "__main__":
-    migrate()
+    run_migrations()
+    print("✅ Migrations appliquées")
@@ -2,7 +2,8 @@
 Modèles SQLAlchemy pour MonLivreDeCuisine
 Relations: User -> Recipes -> Ingredients/Steps
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum as SQLEnum, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum as SQLEnum, Boolean, JSON, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 import enum
 
@@ -20,12 +21,21 @@ class CategorieRecette(str, enum.Enum):
 class User(Base):
     """Modèle utilisateur"""
     __tablename__ = "users"
+    __table_args__ = (
+        # Index partiel: seuls les admins y figurent (recherche "existe-t-il un admin ?")
+        # Le prédicat doit être celui rendu par WHERE users.is_admin sur chaque SGBD
+        Index(
+            "ix_users_is_admin_true", "id",
+            postgresql_where=text("is_admin"),
+            sqlite_where=text("is_admin = 1")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nom = Column(String(100), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    is_admin = Column(Boolean, default=False)
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=text("false"))
 
     # Relation: un utilisateur peut avoir plusieurs recettes
     recipes = relationship("Recipe", back_populates="auteur", cascade="all, delete-orphan")
@@ -34,6 +44,11 @@ class User(Base):
 class Recipe(Base):
     """Modèle recette"""
     __tablename__ = "recipes"
+    __table_args__ = (
+        # Tri par défaut de la liste (ORDER BY categorie, titre, id), pagination par curseur
+        # et filtre par catégorie
+        Index("ix_recipes_categorie_titre_id", "categorie", "titre", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     titre = Column(String(200), nullable=False, index=True)
@@ -42,10 +57,11 @@ class Recipe(Base):
     temps_prep = Column(Integer, nullable=True)  # en minutes
     temps_cuisson = Column(Integer, nullable=True)  # en minutes
     temperature = Column(Integer, nullable=True)  # en °C
-    tags = Column(Text, nullable=True)  # JSON array: ["Végétarien", "Été"]
+    # JSON array: ["Végétarien", "Été"] - JSONB indexé (GIN) sur PostgreSQL
+    tags = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
     
     # Clé étrangère vers User
-    auteur_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    auteur_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     # Relations
     auteur = relationship("User", back_populates="recipes")
@@ -63,7 +79,7 @@ class Ingredient(Base):
     unite = Column(String(50), nullable=True)  # ex: "g", "ml", "pièce"
     
     # Clé étrangère vers Recipe
-    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False, index=True)
 
     # Relation
     recipe = relationship("Recipe", back_populates="ingredients")
@@ -78,7 +94,7 @@ class Step(Base):
     ordre = Column(Integer, nullable=False)  # 1, 2, 3...
     
     # Clé étrangère vers Recipe
-    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False, index=True)
 
     # Relation
     recipe = relationship("Recipe", back_populates="steps")
@@ -95,12 +95,16 @@ class RecipeBase(BaseModel):
     @field_validator('tags', mode='before')
     @classmethod
     def parse_tags(cls, v):
+        """
+        Les tags lus en base sont déjà une liste (colonne JSON, décodée une fois par le driver)
+        Seule une entrée client envoyée en texte JSON ('["Été"]') est encore décodée ici
+        """
         if v is None:
             return []
         if isinstance(v, str):
             try:
                 return json.loads(v)
-            except:
+            except ValueError:
                 return []
         return v
 
@@ -143,12 +147,38 @@ class RecipeListResponse(RecipeBase):
         from_attributes = True
 
 
+class RecipeCursor(BaseModel):
+    """Position de la dernière recette d'une page (paramètres after_* de la suivante)"""
+    after_categorie: str
+    after_titre: str
+    after_id: int
+
+
+class RecipePage(BaseModel):
+    """Page de la liste paginée par curseur"""
+    items: List[RecipeListResponse]
+    next_cursor: Optional[RecipeCursor] = None
+
+
 # ============== FRIGO SEARCH SCHEMAS ==============
 
+# Nombre maximum d'ingrédients distincts par recherche (borne la taille de la requête SQL)
+MAX_FRIGO_INGREDIENTS = 100
+
+
 class FrigoSearchRequest(BaseModel):
     ingredients: List[str] = Field(..., min_items=1)
     strict_mode: bool = False # Si True, ne retourne que les recettes faisables totalement
 
+    @field_validator('ingredients')
+    @classmethod
+    def normalize_ingredients(cls, v):
+        """Nettoie (espaces, casse) et dédoublonne: ["Tomate", "tomate "] -> ["tomate"]"""
+        cleaned = list(dict.fromkeys(ing.strip().lower() for ing in v if ing.strip()))
+        if len(cleaned) > MAX_FRIGO_INGREDIENTS:
+            raise ValueError(f"{MAX_FRIGO_INGREDIENTS} ingrédients maximum par recherche")
+        return cleaned
+
 
 class FrigoSearchResult(BaseModel):
     recipe: RecipeListResponse
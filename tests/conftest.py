@@ -0,0 +1,21 @@
+"""
+Configuration pytest: modules de l'API importables depuis tests/, base SQLite temporaire
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Toujours une base jetable, même si DATABASE_URL pointe ailleurs dans le shell
+# (fixé avant tout import de database.py, qui crée le moteur à l'import)
+_db_fd, TEST_DB_PATH = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Libère les connexions puis supprime la base temporaire"""
+    from database import engine
+    engine.dispose()
+    os.remove(TEST_DB_PATH)
@@ -0,0 +1,57 @@
+"""
+Tests du key builder du cache des recettes
+"""
+from starlette.requests import Request
+
+from cache import request_key_builder
+from database import SessionLocal
+
+
+def get_recipes():
+    """Endpoint factice: seuls __module__ et __name__ comptent pour la clé"""
+
+
+def make_request(path: str = "/recipes", query: str = "") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+
+def key_for(query: str = "", **kwargs) -> str:
+    params = {"search": None, "tag": None, "skip": 0, "limit": 100, **kwargs}
+    return request_key_builder(
+        get_recipes, "mlc:recipes", request=make_request(query=query),
+        kwargs={**params, "db": SessionLocal()}
+    )
+
+
+def test_encoded_separator_does_not_collide():
+    # ?search=tarte%26tag%3D%C3%89t%C3%A9 ne doit pas prendre la clé de ?search=tarte&tag=Été
+    poisoned = key_for(search="tarte&tag=Été")
+    legit = key_for(search="tarte", tag="Été")
+    assert poisoned != legit
+
+
+def test_none_and_string_none_differ():
+    assert key_for(search=None) != key_for(search="None")
+
+
+def test_unknown_query_params_are_ignored():
+    assert key_for(query="junk=1") == key_for(query="junk=2") == key_for()
+
+
+def test_session_is_not_part_of_the_key():
+    assert key_for(search="tarte") == key_for(search="tarte")
+
+
+def test_every_filter_and_cursor_param_is_part_of_the_key():
+    base = {
+        "categorie": None, "search": None, "auteur_id": None, "tag": None, "skip": 0, "limit": 100,
+        "after_categorie": None, "after_titre": None, "after_id": None,
+    }
+    variants = [
+        {"categorie": "Plat"}, {"search": "tarte"}, {"auteur_id": 1}, {"tag": "Été"},
+        {"skip": 10}, {"limit": 10},
+        {"after_categorie": "Plat", "after_titre": "Tarte", "after_id": 1},
+        {"after_categorie": "Plat", "after_titre": "Tarte", "after_id": 2},
+    ]
+    keys = {key_for(**base)} | {key_for(**{**base, **variant}) for variant in variants}
+    assert len(keys) == len(variants) + 1
@@ -0,0 +1,52 @@
+"""
+Tests de la pagination par curseur (/recipes/page) sur la base SQLite temporaire
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def auteur_id(client):
+    """Un auteur avec 4 recettes: ses recettes remplissent exactement 2 pages de 2"""
+    user = {"nom": "Pagination", "email": "pagination@example.com", "password": "secret123"}
+    auteur = client.post("/auth/register", json=user).json()
+    token = client.post(
+        "/auth/login", data={"username": user["email"], "password": user["password"]}
+    ).json()["access_token"]
+    for titre in ("Crêpes", "Gaufres", "Lasagnes", "Quiche"):
+        response = client.post(
+            "/recipes", json={"titre": titre, "categorie": "Plat"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 201
+    return auteur["id"]
+
+
+def test_cursor_follows_to_next_rows_and_ends_on_full_last_page(client, auteur_id):
+    expected = [r["id"] for r in client.get("/recipes", params={"auteur_id": auteur_id}).json()]
+    assert len(expected) == 4
+
+    first = client.get("/recipes/page", params={"auteur_id": auteur_id, "limit": 2}).json()
+    assert [r["id"] for r in first["items"]] == expected[:2]
+    assert first["next_cursor"] is not None
+
+    # Suivre le curseur donne les lignes suivantes
+    second = client.get(
+        "/recipes/page", params={"auteur_id": auteur_id, "limit": 2, **first["next_cursor"]}
+    ).json()
+    assert [r["id"] for r in second["items"]] == expected[2:]
+    # Dernière page pleine: pas de curseur vers une page vide
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_invalid_limit_is_rejected(client, limit):
+    assert client.get("/recipes/page", params={"limit": limit}).status_code == 422